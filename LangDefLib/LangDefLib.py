@@ -24,14 +24,36 @@ LangDefLib - библиотека для определения языка те
 import re
 import os
 import json
+import functools
+from collections import Counter, namedtuple
 from typing import List, Dict, Union, Tuple, Set, Optional, Any
 
+# Ключ узла префиксного дерева окончаний, под которым хранится битовая
+# маска языков. Пустая строка не может совпасть с ключом-символом.
+_TRIE_LANGS = ''
+
+# Все шесть метрик текста в порядке их весов
+_Metrics = namedtuple('_Metrics', [
+    'unique_letters', 'frequent_letters', 'word_endings',
+    'marker_words', 'digrams', 'trigrams'
+])
+
 
 class LanguageData:
     """
     Класс для хранения данных о языке для определения текста.
     """
     
+    # Веса метрик по умолчанию
+    DEFAULT_WEIGHTS = {
+        'unique_letters': 2.0,
+        'frequent_letters': 1.0,
+        'word_endings': 1.5,
+        'marker_words': 3.0,
+        'digrams': 1.0,
+        'trigrams': 1.2
+    }
+    
     def __init__(self, name: str, data: Dict[str, Any]):
         """
         Инициализирует данные для определенного языка.
@@ -44,18 +66,20 @@ class LanguageData:
         self.unique_letters = set(data.get('unique_letters', []))
         self.frequent_letters = set(data.get('frequent_letters', []))
         self.word_endings = data.get('word_endings', [])
-        self.marker_words = set(data.get('marker_words', []))
+        self.marker_words = frozenset(data.get('marker_words', []))
         self.digrams = data.get('digrams', [])
         self.trigrams = data.get('trigrams', [])
         self.alphabet = set(data.get('alphabet', []))
-        self.weights = data.get('weights', {
-            'unique_letters': 2.0,
-            'frequent_letters': 1.0,
-            'word_endings': 1.5,
-            'marker_words': 3.0,
-            'digrams': 1.0,
-            'trigrams': 1.2
-        })
+        
+        # Строки одиночных букв для подсчета через str.count (многобуквенные
+        # элементы вроде 'cz' посимвольно никогда не совпадали, поэтому пропускаются)
+        self.unique_letters_str = ''.join(sorted(c for c in self.unique_letters if len(c) == 1))
+        self.frequent_letters_str = ''.join(sorted(c for c in self.frequent_letters if len(c) == 1))
+        self.weights = data.get('weights', dict(self.DEFAULT_WEIGHTS))
+        
+        # Веса в порядке полей _Metrics; недостающие берутся по умолчанию
+        weights = {**self.DEFAULT_WEIGHTS, **self.weights}
+        self.weight_values = tuple(weights[metric] for metric in _Metrics._fields)
 
 
 class LangDetector:
@@ -72,6 +96,16 @@ class LangDetector:
     # Поддерживаемые языки по умолчанию
     DEFAULT_LANGUAGES = ['russian', 'ukrainian']
     
+    # Любая серия знаков препинания и пробельных символов заменяется одним пробелом
+    _CLEAN_RE = re.compile(r'\W+')
+    _WORD_RE = re.compile(r'\w+')
+    
+    # Для ASCII-текста: все символы, кроме букв, цифр и '_', заменяются пробелом
+    _ASCII_CLEAN_TABLE = str.maketrans({
+        chr(code): ' ' for code in range(128)
+        if not (chr(code).isalnum() or chr(code) == '_')
+    })
+    
     # Встроенные данные о языках (используются, если файлы не найдены)
     BUILTIN_LANGUAGE_DATA = {
         'russian': {
@@ -176,7 +210,11 @@ class LangDetector:
         }
     }
     
-    def __init__(self, languages: List[str] = None, data_dir: str = None, min_confidence: float = 0.6):
+    # Способы подсчета маркерных слов: общий словарь слов или регулярное выражение на язык
+    MARKER_BACKENDS = ('dict', 'regex')
+    
+    def __init__(self, languages: List[str] = None, data_dir: str = None, min_confidence: float = 0.6,
+                 marker_backend: str = 'dict'):
         """
         Инициализирует детектор языка.
         
@@ -187,15 +225,64 @@ class LangDetector:
                                      По умолчанию директория 'data' рядом с файлом библиотеки.
             min_confidence (float, optional): Минимальный порог уверенности для определения языка.
                                             По умолчанию 0.6 (60%).
+            marker_backend (str, optional): Способ подсчета маркерных слов: 'dict' - общий
+                                            словарь слов с масками языков, 'regex' - одно
+                                            скомпилированное выражение на язык.
+                                            По умолчанию 'dict'.
+        
+        Raises:
+            ValueError: Если marker_backend не входит в MARKER_BACKENDS
         """
+        if marker_backend not in self.MARKER_BACKENDS:
+            raise ValueError(f"Неизвестный способ подсчета маркерных слов: '{marker_backend}'")
+        
         self.languages = languages or self.DEFAULT_LANGUAGES
         self.data_dir = data_dir or self.DEFAULT_DATA_DIR
         self.min_confidence = min_confidence
+        self.marker_backend = marker_backend
         
         # Загружаем данные о языках
         self.language_data = {}
+        self._endings_trie = {}
+        self._ngram_index = {}
+        self._lang_index = []
+        self._marker_masks = {}
+        self._marker_patterns = []
+        self._unique_letter_masks = {}
+        self._feature_char_masks = {}
+        self._always_candidates = 0
+        self._zero_scores = {}
+        self._zero_scores_f = {}
         self._load_language_data()
     
+    @classmethod
+    @functools.lru_cache(maxsize=64)
+    def _load_one_language(cls, lang: str, data_dir: str, mtime_ns: Optional[int]) -> Optional[LanguageData]:
+        """
+        Загружает данные одного языка из файла или встроенных данных.
+        
+        Результат кэшируется на уровне процесса, поэтому новые детекторы
+        не перечитывают JSON. Время изменения файла входит в ключ кэша,
+        так что измененный файл будет прочитан заново.
+        
+        Args:
+            lang (str): Код языка
+            data_dir (str): Директория с данными о языках
+            mtime_ns (int, optional): Время изменения файла языка или None, если файла нет
+            
+        Returns:
+            Optional[LanguageData]: Данные о языке или None, если они не найдены
+        """
+        if mtime_ns is not None:
+            with open(os.path.join(data_dir, f"{lang}.json"), 'r', encoding='utf-8') as f:
+                return LanguageData(lang, json.load(f))
+        
+        # Если файл не найден, используем встроенные данные
+        if lang in cls.BUILTIN_LANGUAGE_DATA:
+            return LanguageData(lang, cls.BUILTIN_LANGUAGE_DATA[lang])
+        
+        return None
+    
     def _load_language_data(self) -> None:
         """
         Загружает данные о языках из файлов или встроенных данных.
@@ -205,21 +292,110 @@ class LangDetector:
             
             # Пытаемся загрузить данные из файла
             try:
-                if os.path.exists(lang_file):
-                    with open(lang_file, 'r', encoding='utf-8') as f:
-                        lang_data = json.load(f)
-                        self.language_data[lang] = LanguageData(lang, lang_data)
+                try:
+                    mtime_ns = os.stat(lang_file).st_mtime_ns
+                except OSError:
+                    mtime_ns = None
+                
+                lang_data = self._load_one_language(lang, self.data_dir, mtime_ns)
+                if lang_data is not None:
+                    self.language_data[lang] = lang_data
                 else:
-                    # Если файл не найден, используем встроенные данные
-                    if lang in self.BUILTIN_LANGUAGE_DATA:
-                        self.language_data[lang] = LanguageData(lang, self.BUILTIN_LANGUAGE_DATA[lang])
-                    else:
-                        print(f"Предупреждение: данные для языка '{lang}' не найдены.")
+                    print(f"Предупреждение: данные для языка '{lang}' не найдены.")
             except Exception as e:
                 print(f"Ошибка при загрузке данных для языка '{lang}': {e}")
                 # Если произошла ошибка, используем встроенные данные как запасной вариант
-                if lang in self.BUILTIN_LANGUAGE_DATA:
-                    self.language_data[lang] = LanguageData(lang, self.BUILTIN_LANGUAGE_DATA[lang])
+                lang_data = self._load_one_language(lang, self.data_dir, None)
+                if lang_data is not None:
+                    self.language_data[lang] = lang_data
+        
+        self._build_indexes()
+    
+    def _build_indexes(self) -> None:
+        """
+        Строит общие для всех языков структуры поиска.
+        
+        Вызывается после любого изменения набора языков.
+        """
+        # Заготовки нулевых баллов: копия словаря дешевле генератора
+        self._zero_scores = dict.fromkeys(self.languages, 0)
+        self._zero_scores_f = dict.fromkeys(self.languages, 0.0)
+        
+        # Дерево перевернутых окончаний: слово проходится с конца один раз,
+        # а в узлах, где заканчивается окончание, лежит маска языков с ним
+        trie = {}
+        for i, lang_data in enumerate(self.language_data.values()):
+            for ending in lang_data.word_endings:
+                node = trie
+                for char in reversed(ending):
+                    node = node.setdefault(char, {})
+                node[_TRIE_LANGS] = node.get(_TRIE_LANGS, 0) | (1 << i)
+        self._endings_trie = trie
+        
+        # Индекс n-грамм: каждая n-грамма считается в тексте один раз, даже если
+        # она есть у нескольких языков или и в диграммах, и в триграммах.
+        # Повторы в списке языка дают кратность. Значение -
+        # (маска языков-владельцев, [(0 - диграмма/1 - триграмма, язык, кратность), ...]).
+        ngram_index = {}
+        for i, (lang_code, lang_data) in enumerate(self.language_data.items()):
+            for slot, patterns in enumerate((lang_data.digrams, lang_data.trigrams)):
+                for pattern, multiplicity in Counter(patterns).items():
+                    owners_mask, owners = ngram_index.get(pattern, (0, []))
+                    owners.append((slot, lang_code, multiplicity))
+                    ngram_index[pattern] = (owners_mask | (1 << i), owners)
+        self._ngram_index = ngram_index
+        
+        # Порядковые номера языков для битовых масок: бит i -> self._lang_index[i]
+        self._lang_index = list(self.language_data)
+        
+        # Маркерные слова: слово -> битовая маска языков, в которых оно маркер
+        marker_masks = {}
+        marker_patterns = []
+        if self.marker_backend == 'regex':
+            # Одно выражение на язык. Слова очищенного текста состоят только из \w,
+            # поэтому маркеры с другими символами (и пустые) совпасть не могут.
+            # Длинные варианты идут первыми, чтобы 'была' не уступала 'был'.
+            for lang_data in self.language_data.values():
+                words = sorted(
+                    (word for word in lang_data.marker_words if self._WORD_RE.fullmatch(word)),
+                    key=len, reverse=True
+                )
+                pattern = None
+                if words:
+                    pattern = re.compile(r'\b(?:' + '|'.join(map(re.escape, words)) + r')\b')
+                marker_patterns.append(pattern)
+        else:
+            for i, lang_data in enumerate(self.language_data.values()):
+                for word in lang_data.marker_words:
+                    marker_masks[word] = marker_masks.get(word, 0) | (1 << i)
+        self._marker_masks = marker_masks
+        self._marker_patterns = marker_patterns
+        
+        # Уникальные буквы: буква -> битовая маска языков, для которых она уникальна
+        unique_letter_masks = {}
+        for i, lang_data in enumerate(self.language_data.values()):
+            for char in lang_data.unique_letters_str:
+                unique_letter_masks[char] = unique_letter_masks.get(char, 0) | (1 << i)
+        self._unique_letter_masks = unique_letter_masks
+        
+        # Символы признаков: символ -> маска языков, в признаках которых он есть.
+        # Если в тексте нет ни одного символа из признаков языка, все его
+        # метрики заведомо нулевые. Пустой шаблон совпадает с любым текстом,
+        # поэтому такие языки не отсекаются никогда.
+        feature_char_masks = {}
+        always_candidates = 0
+        for i, lang_data in enumerate(self.language_data.values()):
+            features = (
+                [lang_data.unique_letters_str, lang_data.frequent_letters_str] +
+                lang_data.word_endings + list(lang_data.marker_words) +
+                lang_data.digrams + lang_data.trigrams
+            )
+            if any(not feature for feature in features[2:]):
+                always_candidates |= 1 << i
+            for char in set(''.join(features)):
+                feature_char_masks[char] = feature_char_masks.get(char, 0) | (1 << i)
+        self._feature_char_masks = feature_char_masks
+        self._always_candidates = always_candidates
     
     def add_language(self, lang_code: str, data: Dict[str, Any]) -> None:
         """
@@ -233,6 +409,7 @@ class LangDetector:
             self.languages.append(lang_code)
         
         self.language_data[lang_code] = LanguageData(lang_code, data)
+        self._build_indexes()
     
     def remove_language(self, lang_code: str) -> bool:
         """
@@ -246,8 +423,8 @@ class LangDetector:
         """
         if lang_code in self.languages:
             self.languages.remove(lang_code)
-            if lang_code in self.language_data:
-                del self.language_data[lang_code]
+            self.language_data.pop(lang_code, None)
+            self._build_indexes()
             return True
         return False
     
@@ -264,118 +441,273 @@ class LangDetector:
         # Приводим к нижнему регистру
         text = text.lower()
         
-        # Заменяем все знаки препинания на пробелы
-        text = re.sub(r'[^\w\s]', ' ', text)
+        # Для ASCII-текста обходимся без регулярного выражения
+        if text.isascii():
+            return ' '.join(text.translate(self._ASCII_CLEAN_TABLE).split())
         
-        # Заменяем множественные пробелы на один
-        text = re.sub(r'\s+', ' ', text)
+        # Заменяем знаки препинания и множественные пробелы одним пробелом
+        return self._CLEAN_RE.sub(' ', text).strip()
+    
+    def _char_histogram(self, text: str) -> Counter:
+        """
+        Строит гистограмму символов текста за один проход.
         
-        return text.strip()
+        Args:
+            text (str): Текст для анализа
+            
+        Returns:
+            Counter: Количество вхождений каждого символа
+        """
+        return Counter(text)
     
-    def _count_unique_letters(self, text: str) -> Dict[str, int]:
+    def _count_unique_letters(self, text: str, hist: Optional[Counter] = None) -> Dict[str, int]:
         """
         Подсчитывает количество уникальных букв для каждого языка в тексте.
         
         Args:
             text (str): Текст для анализа
+            hist (Counter, optional): Гистограмма символов текста, если уже посчитана
             
         Returns:
             Dict[str, int]: Словарь {'language_code': score}
         """
-        scores = {}
+        if hist is None:
+            hist = self._char_histogram(text)
         
-        for lang_code, lang_data in self.language_data.items():
-            scores[lang_code] = sum(1 for char in text if char in lang_data.unique_letters)
-        
-        return scores
+        return {
+            lang_code: sum(hist.get(char, 0) for char in lang_data.unique_letters_str)
+            for lang_code, lang_data in self.language_data.items()
+        }
     
-    def _count_frequent_letters(self, text: str) -> Dict[str, int]:
+    def _count_frequent_letters(self, text: str, hist: Optional[Counter] = None) -> Dict[str, int]:
         """
         Подсчитывает количество частотных букв для каждого языка в тексте.
         
         Args:
             text (str): Текст для анализа
+            hist (Counter, optional): Гистограмма символов текста, если уже посчитана
             
         Returns:
             Dict[str, int]: Словарь {'language_code': score}
         """
-        scores = {}
+        if hist is None:
+            hist = self._char_histogram(text)
         
-        for lang_code, lang_data in self.language_data.items():
-            scores[lang_code] = sum(1 for char in text if char in lang_data.frequent_letters)
+        return {
+            lang_code: sum(hist.get(char, 0) for char in lang_data.frequent_letters_str)
+            for lang_code, lang_data in self.language_data.items()
+        }
+    
+    def _candidate_mask(self, hist: Counter) -> int:
+        """
+        Определяет языки, которые могут набрать ненулевые баллы на этом тексте.
         
-        return scores
+        Args:
+            hist (Counter): Гистограмма символов текста
+            
+        Returns:
+            int: Битовая маска языков (бит i соответствует self._lang_index[i])
+        """
+        candidates = self._always_candidates
+        feature_char_masks = self._feature_char_masks
+        for char in hist:
+            candidates |= feature_char_masks.get(char, 0)
+        return candidates
     
-    def _check_word_endings(self, words: List[str]) -> Dict[str, int]:
+    def _quick_unique_exit(self, hist: Counter) -> Optional[str]:
         """
-        Анализирует окончания слов для определения языка.
+        Проверяет, встречаются ли в тексте уникальные буквы ровно одного языка.
         
         Args:
-            words (List[str]): Список слов для анализа
+            hist (Counter): Гистограмма символов текста
             
         Returns:
-            Dict[str, int]: Словарь {'language_code': score}
+            Optional[str]: Код языка или None, если таких букв нет или они от нескольких языков
+        """
+        found = 0
+        for char, mask in self._unique_letter_masks.items():
+            if char in hist:
+                found |= mask
+                # Больше одного установленного бита - языков уже несколько
+                if found & (found - 1):
+                    return None
+        
+        if found:
+            return self._lang_index[found.bit_length() - 1]
+        return None
+    
+    def _score_words(self, words: List[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Считает окончания и маркерные слова за один проход по списку слов.
+        
+        Args:
+            words (List[str]): Список слов в нижнем регистре (после _clean_text)
+            
+        Returns:
+            Tuple[Dict[str, int], Dict[str, int]]: Баллы по окончаниям и по маркерным словам
         """
-        scores = {lang: 0 for lang in self.languages}
+        ending_scores = self._zero_scores.copy()
+        marker_scores = self._zero_scores.copy()
+        trie = self._endings_trie
+        root_mask = trie.get(_TRIE_LANGS, 0)
+        marker_masks = self._marker_masks
+        lang_index = self._lang_index
         
         for word in words:
+            mask = marker_masks.get(word, 0)
+            # Перебираем установленные биты маски, начиная с младшего
+            while mask:
+                low_bit = mask & -mask
+                marker_scores[lang_index[low_bit.bit_length() - 1]] += 1
+                mask ^= low_bit
+            
             if len(word) < 3:
                 continue
             
-            for lang_code, lang_data in self.language_data.items():
-                for ending in lang_data.word_endings:
-                    if word.endswith(ending):
-                        scores[lang_code] += 1
-                        break
+            # Идем по слову с конца, объединяя маски всех совпавших окончаний:
+            # каждый язык получает не больше одного балла за слово
+            node = trie
+            mask = root_mask
+            for char in reversed(word):
+                node = node.get(char)
+                if node is None:
+                    break
+                mask |= node.get(_TRIE_LANGS, 0)
+            
+            while mask:
+                low_bit = mask & -mask
+                ending_scores[lang_index[low_bit.bit_length() - 1]] += 1
+                mask ^= low_bit
         
-        return scores
+        return ending_scores, marker_scores
+    
+    def _check_word_endings(self, words: List[str]) -> Dict[str, int]:
+        """
+        Анализирует окончания слов для определения языка.
+        
+        Args:
+            words (List[str]): Список слов для анализа
+            
+        Returns:
+            Dict[str, int]: Словарь {'language_code': score}
+        """
+        return self._score_words(words)[0]
     
     def _check_marker_words(self, words: List[str]) -> Dict[str, int]:
         """
         Проверяет наличие маркерных слов в тексте.
         
         Args:
-            words (List[str]): Список слов для анализа
+            words (List[str]): Список слов в нижнем регистре (после _clean_text)
             
         Returns:
             Dict[str, int]: Словарь {'language_code': score}
         """
-        scores = {lang: 0 for lang in self.languages}
+        if self.marker_backend == 'regex':
+            return self._check_marker_words_regex(' '.join(words))
+        return self._score_words(words)[1]
+    
+    def _check_marker_words_regex(self, text: str, candidates: Optional[int] = None) -> Dict[str, int]:
+        """
+        Считает маркерные слова регулярным выражением своего языка.
         
-        # Приводим слова к нижнему регистру для сравнения
-        words_lower = [word.lower() for word in words]
+        Args:
+            text (str): Текст в нижнем регистре (после _clean_text)
+            candidates (int, optional): Маска языков, которые могут набрать баллы.
+                                        Выражения остальных языков не применяются.
+            
+        Returns:
+            Dict[str, int]: Словарь {'language_code': score}
+        """
+        scores = self._zero_scores.copy()
         
-        for word in words_lower:
-            for lang_code, lang_data in self.language_data.items():
-                if word in lang_data.marker_words:
-                    scores[lang_code] += 1
+        for i, (lang_code, pattern) in enumerate(zip(self._lang_index, self._marker_patterns)):
+            if pattern is None or (candidates is not None and not candidates >> i & 1):
+                continue
+            scores[lang_code] = len(pattern.findall(text))
         
         return scores
     
+    def _check_all_ngrams(self, text: str,
+                          candidates: Optional[int] = None) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """
+        Проверяет наличие характерных диграмм и триграмм в тексте за один проход по шаблонам.
+        
+        Args:
+            text (str): Текст для анализа в нижнем регистре (после _clean_text)
+            candidates (int, optional): Маска языков, которые могут набрать баллы.
+                                        N-граммы остальных языков не ищутся.
+            
+        Returns:
+            Tuple[Dict[str, int], Dict[str, int]]: Баллы по диграммам и по триграммам
+        """
+        scores_by_slot = (self._zero_scores.copy(), self._zero_scores.copy())
+        
+        for pattern, (owners_mask, owners) in self._ngram_index.items():
+            if candidates is not None and not owners_mask & candidates:
+                continue
+            found = text.count(pattern)
+            if found:
+                for slot, lang_code, multiplicity in owners:
+                    scores_by_slot[slot][lang_code] += found * multiplicity
+        
+        return scores_by_slot
+    
     def _check_ngrams(self, text: str, n: int = 2) -> Dict[str, int]:
         """
         Проверяет наличие характерных n-грамм в тексте.
         
         Args:
-            text (str): Текст для анализа
+            text (str): Текст для анализа в нижнем регистре (после _clean_text)
             n (int): Размер n-граммы (2 для диграмм, 3 для триграмм)
             
         Returns:
             Dict[str, int]: Словарь {'language_code': score}
         """
-        scores = {lang: 0 for lang in self.languages}
+        if n not in (2, 3):
+            return self._zero_scores.copy()
         
-        text_lower = text.lower()
+        return self._check_all_ngrams(text)[n - 2]
+    
+    def _scan(self, cleaned_text: str, words: List[str], hist: Optional[Counter] = None) -> _Metrics:
+        """
+        Собирает все метрики текста.
         
-        for lang_code, lang_data in self.language_data.items():
-            if n == 2 and hasattr(lang_data, 'digrams'):
-                for digram in lang_data.digrams:
-                    scores[lang_code] += text_lower.count(digram)
-            elif n == 3 and hasattr(lang_data, 'trigrams'):
-                for trigram in lang_data.trigrams:
-                    scores[lang_code] += text_lower.count(trigram)
+        Символы текста считаются один раз в гистограмму, слова проходятся
+        один раз для окончаний и маркерных слов сразу.
         
-        return scores
+        Args:
+            cleaned_text (str): Очищенный текст
+            words (List[str]): Слова очищенного текста
+            hist (Counter, optional): Гистограмма символов, если уже посчитана
+            
+        Returns:
+            _Metrics: Баллы по всем шести метрикам
+        """
+        if hist is None:
+            hist = self._char_histogram(cleaned_text)
+        
+        # Языки без единого символа своих признаков в тексте пропускаются
+        candidates = self._candidate_mask(hist)
+        
+        if candidates:
+            word_endings, marker_words = self._score_words(words)
+        else:
+            word_endings, marker_words = self._zero_scores.copy(), self._zero_scores.copy()
+        
+        if self.marker_backend == 'regex':
+            marker_words = self._check_marker_words_regex(cleaned_text, candidates)
+        
+        digrams, trigrams = self._check_all_ngrams(cleaned_text, candidates)
+        
+        return _Metrics(
+            self._count_unique_letters(cleaned_text, hist),
+            self._count_frequent_letters(cleaned_text, hist),
+            word_endings,
+            marker_words,
+            digrams,
+            trigrams
+        )
     
     def _calculate_weighted_scores(self, 
                                   unique_letters: Dict[str, int],
@@ -398,16 +730,18 @@ class LangDetector:
         Returns:
             Dict[str, float]: Словарь с общими взвешенными баллами для каждого языка
         """
-        scores = {lang: 0.0 for lang in self.languages}
+        scores = self._zero_scores_f.copy()
         
         for lang_code, lang_data in self.language_data.items():
+            (w_unique, w_frequent, w_endings,
+             w_markers, w_digrams, w_trigrams) = lang_data.weight_values
             scores[lang_code] = (
-                unique_letters.get(lang_code, 0) * lang_data.weights.get('unique_letters', 2.0) +
-                frequent_letters.get(lang_code, 0) * lang_data.weights.get('frequent_letters', 1.0) +
-                word_endings.get(lang_code, 0) * lang_data.weights.get('word_endings', 1.5) +
-                marker_words.get(lang_code, 0) * lang_data.weights.get('marker_words', 3.0) +
-                digrams.get(lang_code, 0) * lang_data.weights.get('digrams', 1.0) +
-                trigrams.get(lang_code, 0) * lang_data.weights.get('trigrams', 1.2)
+                unique_letters.get(lang_code, 0) * w_unique +
+                frequent_letters.get(lang_code, 0) * w_frequent +
+                word_endings.get(lang_code, 0) * w_endings +
+                marker_words.get(lang_code, 0) * w_markers +
+                digrams.get(lang_code, 0) * w_digrams +
+                trigrams.get(lang_code, 0) * w_trigrams
             )
         
         return scores
@@ -439,30 +773,19 @@ class LangDetector:
         if not words:
             return {'language': 'unknown', 'confidence': 0.0}
         
-        # Быстрая проверка на уникальные буквы
-        unique_scores = self._count_unique_letters(cleaned_text)
+        # Гистограмма символов общая для всех буквенных метрик
+        hist = self._char_histogram(cleaned_text)
         
         # Если есть явные признаки одного языка по уникальным буквам
-        for lang, score in unique_scores.items():
-            if score > 0 and all(s == 0 for l, s in unique_scores.items() if l != lang):
-                return {'language': lang, 'confidence': 0.95}
+        quick_lang = self._quick_unique_exit(hist)
+        if quick_lang is not None:
+            return {'language': quick_lang, 'confidence': 0.95}
         
         # Полный анализ
-        frequent_letters = self._count_frequent_letters(cleaned_text)
-        word_endings = self._check_word_endings(words)
-        marker_words = self._check_marker_words(words)
-        digrams = self._check_ngrams(cleaned_text, n=2)
-        trigrams = self._check_ngrams(cleaned_text, n=3)
+        metrics = self._scan(cleaned_text, words, hist)
         
         # Рассчитываем взвешенные баллы
-        scores = self._calculate_weighted_scores(
-            unique_scores,
-            frequent_letters,
-            word_endings,
-            marker_words,
-            digrams,
-            trigrams
-        )
+        scores = self._calculate_weighted_scores(*metrics)
         
         # Общая сумма баллов
         total_score = sum(scores.values())
@@ -526,22 +849,10 @@ class LangDetector:
         words = cleaned_text.split()
         
         # Собираем все метрики
-        unique_letters = self._count_unique_letters(cleaned_text)
-        frequent_letters = self._count_frequent_letters(cleaned_text)
-        word_endings = self._check_word_endings(words)
-        marker_words = self._check_marker_words(words)
-        digrams = self._check_ngrams(cleaned_text, n=2)
-        trigrams = self._check_ngrams(cleaned_text, n=3)
+        metrics = self._scan(cleaned_text, words)
         
         # Рассчитываем взвешенные баллы
-        scores = self._calculate_weighted_scores(
-            unique_letters,
-            frequent_letters,
-            word_endings,
-            marker_words,
-            digrams,
-            trigrams
-        )
+        scores = self._calculate_weighted_scores(*metrics)
         
         # Общая сумма баллов
         total_score = sum(scores.values())
@@ -570,14 +881,7 @@ class LangDetector:
         }
         
         # Добавляем метрики
-        result['metrics'] = {
-            'unique_letters': unique_letters,
-            'frequent_letters': frequent_letters,
-            'word_endings': word_endings,
-            'marker_words': marker_words,
-            'digrams': digrams,
-            'trigrams': trigrams
-        }
+        result['metrics'] = metrics._asdict()
         
         # Добавляем баллы
         result['scores'] = scores
@@ -631,10 +935,17 @@ class LangDetector:
         return result['language']
 
 
+# Детекторы для detect_language по списку языков (None - языки по умолчанию).
+# Эти экземпляры общие, поэтому их нельзя менять через add_language/remove_language.
+_DETECTOR_CACHE: Dict[Optional[Tuple[str, ...]], 'LangDetector'] = {}
+
+
 def detect_language(text: str, languages: List[str] = None) -> Dict[str, Any]:
     """
     Вспомогательная функция для быстрого определения языка текста.
     
+    Детектор для каждого списка языков создается один раз и переиспользуется.
+    
     Args:
         text (str): Текст для анализа
         languages (List[str], optional): Список языков для детекции.
@@ -643,7 +954,15 @@ def detect_language(text: str, languages: List[str] = None) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Словарь с результатом {'language': str, 'confidence': float}
     """
-    detector = LangDetector(languages=languages)
+    # Порядок языков не сортируется: он определяет выбор при равных баллах
+    key = tuple(languages) if languages else None
+    
+    detector = _DETECTOR_CACHE.get(key)
+    if detector is None:
+        detector = _DETECTOR_CACHE.setdefault(
+            key, LangDetector(languages=list(languages) if languages else None)
+        )
+    
     return detector.detect(text)
 
 
@@ -7,13 +7,85 @@
 """
 
 import os
+import re
 import warnings
 import logging
-from typing import Dict, Any, List, Optional, Union, Tuple, Set
+import functools
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Union, Tuple, Set, FrozenSet
 
 # Настройка логирования
 logger = logging.getLogger(__name__)
 
+# Распространенные языки для langdetect_languages: покрывают большую часть
+# текстов, а профилей загружается почти вчетверо меньше, чем всего есть
+LANGDETECT_COMMON_LANGUAGES: FrozenSet[str] = frozenset({
+    'en', 'es', 'ar', 'fr', 'de', 'it', 'pt', 'ru', 'ja', 'ko',
+    'zh-cn', 'zh-tw', 'hi', 'bn', 'id'
+})
+
+# Хотя бы одна буква: числа, эмодзи, знаки препинания и прочие строки без букв
+# определять бессмысленно, детекторы для них не вызываются
+_HAS_LETTER_RE = re.compile(r'[^\W\d_]')
+
+# Метки fastText имеют вид '__label__ru'
+_LABEL_PREFIX_LEN = len('__label__')
+
+# fastText читает текст построчно: переводы строк и табуляции заменяются
+# пробелами за один проход str.translate (текст уже обрезан до FASTTEXT_MAX_CHARS)
+_CLEAN_TABLE = str.maketrans({'\n': ' ', '\r': ' ', '\t': ' '})
+
+
+def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Копирует результат detect без copy.deepcopy.
+    
+    Результаты состоят из словарей не глубже двух уровней, значения которых -
+    строки, числа и списки строк; копируются все словари и списки. У результата
+    метода 'all' ключ 'best' остается тем же объектом, что и results[best_method].
+    
+    Args:
+        result (Dict[str, Any]): Результат detect
+        
+    Returns:
+        Dict[str, Any]: Независимая копия результата
+    """
+    copied = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            value = {k: list(v) if isinstance(v, list) else v for k, v in value.items()}
+        elif isinstance(value, list):
+            value = list(value)
+        copied[key] = value
+    
+    best_method = result.get('best_method')
+    if best_method is not None and result.get('best') is result.get(best_method):
+        copied['best'] = copied[best_method]
+    return copied
+
+
+def _too_short(text: str, n: int) -> bool:
+    """
+    Проверяет, что текст без пробельных символов по краям короче n символов.
+    
+    Равносильно len(text.strip()) < n, но копирует строку только тогда,
+    когда она начинается или заканчивается пробельным символом.
+    
+    Args:
+        text (str): Непустой текст
+        n (int): Минимальная длина
+        
+    Returns:
+        bool: True, если текст слишком короткий
+    """
+    if len(text) < n:
+        return True
+    if text[0].isspace() or text[-1].isspace():
+        return len(text.strip()) < n
+    return False
+
 
 class ExternalDetector:
     """
@@ -21,6 +93,21 @@ class ExternalDetector:
     Поддерживает fastText и langdetect.
     """
     
+    # Фиксированный набор атрибутов: экземпляр без __dict__ легче и быстрее
+    __slots__ = (
+        'use_fasttext', 'use_langdetect', 'min_confidence', 'early_exit_confidence',
+        'fasttext_model', 'langdetect_module', 'cache_size', '_cache', '_cache_lock',
+        '_pool', '_dispatch'
+    )
+    
+    # Сколько первых символов текста передается fastText: модель усредняет
+    # векторы n-грамм, и продолжение длинного текста почти не меняет ответ
+    FASTTEXT_MAX_CHARS = 512
+    
+    # Кэшируются результаты только для текстов не длиннее этого значения:
+    # повторяются обычно короткие строки, а длинные держать в памяти дорого
+    CACHE_MAX_TEXT_LEN = 256
+    
     def __init__(
         self, 
         use_fasttext: bool = True, 
@@ -28,7 +115,10 @@ class ExternalDetector:
         fasttext_model_path: Optional[str] = None,
         fasttext_model_size: str = 'small',
         min_confidence: float = 0.5,
-        log_level: int = logging.WARNING
+        log_level: Optional[int] = None,
+        early_exit_confidence: Optional[float] = 0.9,
+        cache_size: int = 65536,
+        langdetect_languages: Optional[Set[str]] = None
     ):
         """
         Инициализирует детектор с указанными внешними библиотеками.
@@ -39,14 +129,46 @@ class ExternalDetector:
             fasttext_model_path (str, optional): Путь к модели fastText
             fasttext_model_size (str): Размер модели fastText ('small' или 'big')
             min_confidence (float): Минимальная уверенность для определения языка
-            log_level (int): Уровень логирования (по умолчанию WARNING)
+            log_level (int, optional): Уровень логгера модуля. По умолчанию не меняется:
+                                       уровень и вывод логов настраивает вызывающий код,
+                                       например logging.basicConfig
+            early_exit_confidence (float, optional): Уверенность fastText, начиная с которой
+                                                     метод 'all' не запускает langdetect.
+                                                     None - всегда запускать все методы.
+            cache_size (int): Количество запоминаемых результатов detect для коротких
+                              текстов (0 - без кэша)
+            langdetect_languages (Set[str], optional): Коды языков, профили которых загружает
+                                                       langdetect (например, LANGDETECT_COMMON_LANGUAGES).
+                                                       По умолчанию загружаются все профили.
         """
-        # Настройка логирования
-        logging.basicConfig(level=log_level)
+        # Уровень логгера модуля меняется, только если он передан явно: иначе каждое
+        # создание детектора сбрасывало бы уровень, настроенный приложением
+        if log_level is not None:
+            logger.setLevel(log_level)
         
         self.use_fasttext = use_fasttext
         self.use_langdetect = use_langdetect
         self.min_confidence = min_confidence
+        self.early_exit_confidence = early_exit_confidence
+        
+        # Кэш результатов detect: (метод, настройки, текст) -> результат, в порядке
+        # использования. Один экземпляр может использоваться из нескольких потоков
+        # (вспомогательные функции модуля и пакетные методы), поэтому доступ к кэшу
+        # идет под блокировкой
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        # Пул потоков для пакетной обработки, создается при первой необходимости
+        self._pool = None
+        
+        # Обработчики методов detect: выбор по словарю вместо цепочки сравнений
+        self._dispatch = {
+            'fasttext': self._detect_fasttext_only,
+            'langdetect': self._detect_langdetect_only,
+            'vote': self._vote_language,
+            'all': self._detect_all
+        }
         
         # Инициализируем библиотеки
         self.fasttext_model = None
@@ -57,7 +179,7 @@ class ExternalDetector:
             self._load_fasttext(fasttext_model_path, fasttext_model_size)
         
         if self.use_langdetect:
-            self._load_langdetect()
+            self._load_langdetect(langdetect_languages)
         
         # Проверяем, что хотя бы одна библиотека загружена
         if not (self.use_fasttext or self.use_langdetect):
@@ -75,16 +197,21 @@ class ExternalDetector:
             model_size (str): Размер модели fastText ('small' или 'big')
         """
         try:
-            # Попытка импортировать fasttext-wheel
+            # Модуль fasttext устанавливают пакеты fasttext, fasttext-wheel и
+            # fasttext-predict. Последний содержит только инференс, меньше весит
+            # и не тянет numpy, поэтому для определения языка предпочтителен.
             try:
                 import fasttext
-                logger.info("Используется fasttext-wheel")
             except ImportError:
-                try:
-                    import fasttext
-                    logger.info("Используется fasttext")
-                except ImportError:
-                    raise ImportError("Не удалось импортировать fasttext. Установите: pip install fasttext-wheel")
+                raise ImportError(
+                    "Не удалось импортировать fasttext. Установите: "
+                    "pip install fasttext-predict (или pip install fasttext-wheel)"
+                )
+            
+            if hasattr(fasttext, 'train_supervised'):
+                logger.info("Используется fasttext")
+            else:
+                logger.info("Используется fasttext-predict")
             
             # Если путь не указан, используем стандартные пути к моделям
             if model_path is None:
@@ -124,13 +251,16 @@ class ExternalDetector:
         except ImportError as e:
             warnings.warn(
                 f"Ошибка при импорте fastText: {e}. Для использования fastText установите: "
-                "pip install fasttext-wheel"
+                "pip install fasttext-predict"
             )
             self.use_fasttext = False
     
-    def _load_langdetect(self) -> None:
+    def _load_langdetect(self, languages: Optional[Set[str]] = None) -> None:
         """
         Загружает библиотеку langdetect для определения языка.
+        
+        Args:
+            languages (Set[str], optional): Коды языков, профили которых нужно загрузить
         """
         try:
             import langdetect
@@ -142,6 +272,9 @@ class ExternalDetector:
                 langdetect.DetectorFactory.seed = 0
             except:
                 logger.warning("Не удалось установить seed для langdetect")
+            
+            if languages:
+                self._load_langdetect_profiles(languages)
                 
         except ImportError:
             warnings.warn(
@@ -150,6 +283,40 @@ class ExternalDetector:
             )
             self.use_langdetect = False
     
+    def _load_langdetect_profiles(self, languages: Set[str]) -> None:
+        """
+        Загружает в langdetect только профили указанных языков.
+        
+        Меньше профилей - меньше памяти и быстрее каждый вызов. langdetect
+        хранит фабрику профилей глобально, поэтому ограничение действует
+        на весь процесс.
+        
+        Args:
+            languages (Set[str]): Коды языков langdetect ('en', 'ru', 'zh-cn', ...)
+        """
+        try:
+            detector_factory = self.langdetect_module.detector_factory
+            profiles = []
+            for lang in sorted(languages):
+                path = os.path.join(detector_factory.PROFILES_DIRECTORY, lang)
+                if os.path.exists(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        profiles.append(f.read())
+                else:
+                    logger.warning(f"Профиль langdetect для языка '{lang}' не найден")
+            
+            if not profiles:
+                logger.warning("Ни один профиль langdetect не найден, загружаются все профили")
+                return
+            
+            factory = detector_factory.DetectorFactory()
+            factory.load_json_profile(profiles)
+            # detect() создает фабрику, только если ее еще нет
+            detector_factory._factory = factory
+            logger.info(f"Загружено профилей langdetect: {len(profiles)}")
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить выбранные профили langdetect: {e}")
+    
     def detect_fasttext(self, text: str, k: int = 1) -> List[Dict[str, Any]]:
         """
         Определяет язык текста с использованием fastText.
@@ -165,34 +332,77 @@ class ExternalDetector:
             return []
         
         # Обрабатываем пустой или слишком короткий текст
-        if not text or len(text.strip()) < 3:
+        if not text or _too_short(text, 3):
             logger.debug("Текст слишком короткий для fastText")
             return []
         
+        text = text[:self.FASTTEXT_MAX_CHARS].translate(_CLEAN_TABLE)
+        
         try:
             # Получаем предсказания модели
             labels, scores = self.fasttext_model.predict(text, k=k)
             
             # Обрабатываем результаты
             results = []
-            for i in range(len(labels)):
-                if i < len(scores):
-                    # Извлекаем язык из метки (__label__ru -> ru)
-                    lang = labels[i].replace('__label__', '')
-                    confidence = float(scores[i])
-                    
-                    # Добавляем язык, только если уверенность выше порога
-                    if confidence >= self.min_confidence:
-                        results.append({
-                            'language': lang,
-                            'confidence': confidence
-                        })
+            for label, score in zip(labels, scores):
+                confidence = float(score)
+                
+                # Добавляем язык, только если уверенность выше порога
+                if confidence >= self.min_confidence:
+                    results.append({
+                        # Извлекаем язык из метки (__label__ru -> ru)
+                        'language': label[_LABEL_PREFIX_LEN:],
+                        'confidence': confidence
+                    })
             
             return results
         except Exception as e:
             logger.error(f"Ошибка при определении языка с fastText: {e}")
             return []
     
+    def detect_fasttext_batch(self, texts: List[str], k: int = 1) -> List[List[Dict[str, Any]]]:
+        """
+        Определяет язык списка текстов с использованием fastText за один вызов модели.
+        
+        Args:
+            texts (List[str]): Тексты для анализа
+            k (int): Количество возвращаемых языков для каждого текста
+            
+        Returns:
+            List[List[Dict[str, Any]]]: Результаты в порядке текстов, как у detect_fasttext
+        """
+        batch_results = [[] for _ in texts]
+        
+        if not self.use_fasttext or not self.fasttext_model:
+            return batch_results
+        
+        # Пустые и слишком короткие тексты в модель не передаются
+        kept = [i for i, text in enumerate(texts) if text and not _too_short(text, 3)]
+        if not kept:
+            return batch_results
+        
+        try:
+            # fastText обрабатывает каждую строку как отдельный текст, переводы строк недопустимы
+            max_chars = self.FASTTEXT_MAX_CHARS
+            labels_batch, scores_batch = self.fasttext_model.predict(
+                [texts[i][:max_chars].translate(_CLEAN_TABLE) for i in kept], k=k
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при пакетном определении языка с fastText: {e}")
+            return batch_results
+        
+        for i, labels, scores in zip(kept, labels_batch, scores_batch):
+            results = batch_results[i]
+            for label, score in zip(labels, scores):
+                confidence = float(score)
+                if confidence >= self.min_confidence:
+                    results.append({
+                        'language': label[_LABEL_PREFIX_LEN:],
+                        'confidence': confidence
+                    })
+        
+        return batch_results
+    
     def detect_langdetect(self, text: str) -> List[Dict[str, Any]]:
         """
         Определяет язык текста с использованием langdetect.
@@ -207,32 +417,73 @@ class ExternalDetector:
             return []
         
         # Обрабатываем пустой или слишком короткий текст
-        if not text or len(text.strip()) < 10:  # langdetect требует больше текста
+        if not text or _too_short(text, 10):  # langdetect требует больше текста
             logger.debug("Текст слишком короткий для langdetect")
             return []
         
         try:
-            # Определяем язык с помощью langdetect
-            result = self.langdetect_module.detect(text)
-            
-            # Используем langdetect.detect_langs для получения вероятностей
+            # detect_langs возвращает языки по убыванию вероятности, поэтому
+            # первый элемент - это и язык, и уверенность за один проход
             probabilities = self.langdetect_module.detect_langs(text)
-            confidence = 0.0
-            
-            # Ищем вероятность для определенного языка
-            for prob in probabilities:
-                if prob.lang == result:
-                    confidence = prob.prob
-                    break
+            if not probabilities:
+                return []
             
+            top = probabilities[0]
             return [{
-                'language': result,
-                'confidence': confidence
+                'language': top.lang,
+                'confidence': top.prob
             }]
         except Exception as e:
             logger.debug(f"Ошибка при определении языка с langdetect: {e}")
             return []
     
+    def detect_langdetect_batch(self, texts: List[str], max_workers: Optional[int] = None) -> List[List[Dict[str, Any]]]:
+        """
+        Определяет язык списка текстов с использованием langdetect в пуле потоков.
+        
+        Args:
+            texts (List[str]): Тексты для анализа
+            max_workers (int, optional): Количество потоков. По умолчанию используется
+                                         общий пул детектора (см. close)
+            
+        Returns:
+            List[List[Dict[str, Any]]]: Результаты в порядке текстов, как у detect_langdetect
+        """
+        if not self.use_langdetect or not self.langdetect_module:
+            return [[] for _ in texts]
+        
+        # Профили языков загружаются лениво и без блокировки, поэтому
+        # загружаем их заранее, до запуска потоков
+        try:
+            self.langdetect_module.detector_factory.init_factory()
+        except Exception as e:
+            logger.debug(f"Ошибка при загрузке профилей langdetect: {e}")
+        
+        if max_workers is None:
+            return list(self._get_pool().map(self.detect_langdetect, texts))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.detect_langdetect, texts))
+    
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """
+        Возвращает общий пул потоков детектора, создавая его при первом обращении.
+        
+        Returns:
+            ThreadPoolExecutor: Пул потоков
+        """
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor()
+        return self._pool
+    
+    def close(self) -> None:
+        """
+        Останавливает пул потоков пакетной обработки, если он был создан.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
     def detect(self, text: str, method: str = 'all') -> Dict[str, Any]:
         """
         Определяет язык текста с использованием указанного метода.
@@ -244,49 +495,113 @@ class ExternalDetector:
         Returns:
             Dict[str, Any]: Словарь с языком и уверенностью определения
         """
-        if not text or not isinstance(text, str) or len(text.strip()) < 3:
+        if not text or not isinstance(text, str) or _too_short(text, 3):
             return {'language': 'unknown', 'confidence': 0.0, 'method': method}
         
-        # Выбираем метод определения
-        if method == 'fasttext':
-            if not self.use_fasttext:
-                return {'language': 'unknown', 'confidence': 0.0, 'method': 'fasttext'}
-            
-            results = self.detect_fasttext(text)
-            if results:
-                result = results[0]
-                return {
-                    'language': result['language'],
-                    'confidence': result['confidence'],
-                    'method': 'fasttext'
-                }
-            else:
-                return {'language': 'unknown', 'confidence': 0.0, 'method': 'fasttext'}
+        # Текст без единой буквы ни на каком языке не написан
+        if not _HAS_LETTER_RE.search(text):
+            return {'language': 'unknown', 'confidence': 0.0, 'method': method}
         
-        elif method == 'langdetect':
-            if not self.use_langdetect:
-                return {'language': 'unknown', 'confidence': 0.0, 'method': 'langdetect'}
-            
-            results = self.detect_langdetect(text)
-            if results:
-                result = results[0]
-                return {
-                    'language': result['language'],
-                    'confidence': result['confidence'],
-                    'method': 'langdetect'
-                }
-            else:
-                return {'language': 'unknown', 'confidence': 0.0, 'method': 'langdetect'}
+        if self.cache_size <= 0 or len(text) > self.CACHE_MAX_TEXT_LEN:
+            return self._detect_uncached(text, method)
         
-        elif method == 'vote':
-            return self._vote_language(text)
+        # В ключ входят изменяемые настройки, от которых зависит результат:
+        # после их изменения старые записи просто перестают находиться
+        key = (method, self.min_confidence, self.early_exit_confidence,
+               self.use_fasttext, self.use_langdetect, text)
+        cache = self._cache
+        with self._cache_lock:
+            cached = cache.get(key)
+            if cached is not None:
+                cache.move_to_end(key)
         
-        elif method == 'all':
-            return self._detect_all(text)
+        # Вызывающий код может менять результат, поэтому в кэше хранится
+        # отдельная копия: при промахе возвращается свежий результат, при попадании - копия
+        if cached is not None:
+            return _copy_result(cached)
         
-        else:
+        # Детекторы работают вне блокировки: потоки не ждут друг друга
+        result = self._detect_uncached(text, method)
+        stored = _copy_result(result)
+        with self._cache_lock:
+            cache[key] = stored
+            cache.move_to_end(key)
+            while len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return result
+    
+    def clear_cache(self) -> None:
+        """
+        Очищает кэш результатов detect.
+        
+        Изменение min_confidence, early_exit_confidence и use_* учитывается
+        автоматически (они входят в ключ кэша). Вызывать нужно после замены
+        fasttext_model или langdetect_module.
+        """
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def _detect_uncached(self, text: str, method: str) -> Dict[str, Any]:
+        """
+        Определяет язык текста указанным методом без обращения к кэшу.
+        
+        Args:
+            text (str): Текст для анализа (уже проверенный в detect)
+            method (str): Метод определения языка: 'fasttext', 'langdetect', 'vote', 'all'
+            
+        Returns:
+            Dict[str, Any]: Словарь с языком и уверенностью определения
+        """
+        # Выбираем метод определения
+        handler = self._dispatch.get(method)
+        if handler is None:
             logger.warning(f"Неизвестный метод: {method}. Используется метод 'vote'.")
-            return self._vote_language(text)
+            handler = self._vote_language
+        
+        return handler(text)
+    
+    def _detect_fasttext_only(self, text: str) -> Dict[str, Any]:
+        """
+        Определяет язык текста только с помощью fastText (метод 'fasttext').
+        
+        Args:
+            text (str): Текст для анализа
+            
+        Returns:
+            Dict[str, Any]: Словарь с языком и уверенностью определения
+        """
+        return self._method_result('fasttext', self.detect_fasttext(text) if self.use_fasttext else [])
+    
+    def _detect_langdetect_only(self, text: str) -> Dict[str, Any]:
+        """
+        Определяет язык текста только с помощью langdetect (метод 'langdetect').
+        
+        Args:
+            text (str): Текст для анализа
+            
+        Returns:
+            Dict[str, Any]: Словарь с языком и уверенностью определения
+        """
+        return self._method_result('langdetect', self.detect_langdetect(text) if self.use_langdetect else [])
+    
+    def _method_result(self, method: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Приводит результат одного метода к виду, который возвращает detect.
+        
+        Args:
+            method (str): Название метода ('fasttext' или 'langdetect')
+            results (List[Dict[str, Any]]): Результат detect_fasttext или detect_langdetect
+            
+        Returns:
+            Dict[str, Any]: Словарь с языком, уверенностью и методом
+        """
+        if results:
+            return {
+                'language': results[0]['language'],
+                'confidence': results[0]['confidence'],
+                'method': method
+            }
+        return {'language': 'unknown', 'confidence': 0.0, 'method': method}
     
     def _vote_language(self, text: str) -> Dict[str, Any]:
         """
@@ -298,60 +613,65 @@ class ExternalDetector:
         Returns:
             Dict[str, Any]: Словарь с языком и уверенностью определения
         """
-        votes = {}
-        method_results = {}
+        ft_results = self.detect_fasttext(text, k=1) if self.use_fasttext else []
+        ld_results = self.detect_langdetect(text) if self.use_langdetect else []
         
-        # Получаем результаты от всех доступных методов
-        if self.use_fasttext:
-            ft_results = self.detect_fasttext(text, k=1)
-            if ft_results:
-                lang = ft_results[0]['language']
-                conf = ft_results[0]['confidence']
-                votes[lang] = votes.get(lang, 0) + conf
-                method_results['fasttext'] = {'language': lang, 'confidence': conf}
+        return self._combine_votes(ft_results, ld_results)
+    
+    def _combine_votes(self, ft_results: List[Dict[str, Any]],
+                       ld_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Подводит итог голосования по уже полученным результатам методов.
         
-        if self.use_langdetect:
-            ld_results = self.detect_langdetect(text)
-            if ld_results:
-                lang = ld_results[0]['language']
-                conf = ld_results[0]['confidence']
-                votes[lang] = votes.get(lang, 0) + conf
-                method_results['langdetect'] = {'language': lang, 'confidence': conf}
+        Args:
+            ft_results (List[Dict[str, Any]]): Результат detect_fasttext
+            ld_results (List[Dict[str, Any]]): Результат detect_langdetect
+            
+        Returns:
+            Dict[str, Any]: Словарь с языком и уверенностью определения
+        """
+        ft = ft_results[0] if ft_results else None
+        ld = ld_results[0] if ld_results else None
         
         # Если нет голосов, возвращаем неизвестный язык
-        if not votes:
+        if ft is None and ld is None:
             return {'language': 'unknown', 'confidence': 0.0, 'method': 'vote'}
         
-        # Находим лучший язык по голосам
-        best_lang = max(votes.items(), key=lambda x: x[1])
-        language = best_lang[0]
-        
-        # Считаем среднюю уверенность для лучшего языка
-        confidence_sum = 0.0
-        num_methods = 0
-        
-        for method, result in method_results.items():
-            if result['language'] == language:
-                confidence_sum += result['confidence']
-                num_methods += 1
-        
-        # Если нет совпадений, берем уверенность из голосов
-        if num_methods == 0:
-            confidence = best_lang[1] / sum(votes.values())
+        if ld is None:
+            language, confidence, methods_used = ft['language'], ft['confidence'], ['fasttext']
+        elif ft is None:
+            language, confidence, methods_used = ld['language'], ld['confidence'], ['langdetect']
         else:
-            confidence = confidence_sum / num_methods
+            methods_used = ['fasttext', 'langdetect']
+            if ft['language'] == ld['language']:
+                # Методы согласны - средняя уверенность
+                language = ft['language']
+                confidence = (ft['confidence'] + ld['confidence']) / 2
+            elif ft['confidence'] >= ld['confidence']:
+                # Методы расходятся - побеждает более уверенный, при равенстве fastText
+                language, confidence = ft['language'], ft['confidence']
+            else:
+                language, confidence = ld['language'], ld['confidence']
         
         return {
             'language': language,
             'confidence': confidence,
             'method': 'vote',
-            'methods_used': list(method_results.keys())
+            'methods_used': methods_used
         }
     
     def _detect_all(self, text: str) -> Dict[str, Any]:
         """
         Определяет язык всеми доступными методами и возвращает лучший результат.
         
+        Каждый детектор вызывается не больше одного раза, голосование
+        считается по их результатам. Если fastText уверен не меньше чем
+        на early_exit_confidence, медленный langdetect не запускается.
+        
+        Методы выполняются последовательно: fastText занимает микросекунды,
+        поэтому параллельный запуск не сократил бы время ответа, зато
+        не позволил бы пропустить langdetect.
+        
         Args:
             text (str): Текст для анализа
             
@@ -359,16 +679,24 @@ class ExternalDetector:
             Dict[str, Any]: Словарь с языком и уверенностью определения
         """
         results = {}
+        ft_results = []
+        ld_results = []
         
-        # Получаем результаты от всех методов
         if self.use_fasttext:
-            results['fasttext'] = self.detect(text, method='fasttext')
+            ft_results = self.detect_fasttext(text)
+            results['fasttext'] = self._method_result('fasttext', ft_results)
         
-        if self.use_langdetect:
-            results['langdetect'] = self.detect(text, method='langdetect')
+        early_exit = (
+            self.early_exit_confidence is not None and
+            bool(ft_results) and ft_results[0]['confidence'] >= self.early_exit_confidence
+        )
+        
+        if self.use_langdetect and not early_exit:
+            ld_results = self.detect_langdetect(text)
+            results['langdetect'] = self._method_result('langdetect', ld_results)
         
         # Добавляем результат голосования
-        results['vote'] = self._vote_language(text)
+        results['vote'] = self._combine_votes(ft_results, ld_results)
         
         # Находим метод с наивысшей уверенностью
         best_method = None
@@ -399,16 +727,25 @@ class ExternalDetector:
             Dict[str, Any]: Словарь с результатами всех методов
         """
         results = {}
+        ft_results = []
+        ld_results = []
+        
+        # Каждый детектор вызывается один раз: его результат идет и в ответ, и в голосование.
+        # Текст без букв, как и в detect, не определяется
+        detectable = isinstance(text, str) and _HAS_LETTER_RE.search(text) is not None
         
-        # Получаем результаты от всех методов
         if self.use_fasttext:
-            results['fasttext'] = self.detect(text, method='fasttext')
+            if detectable:
+                ft_results = self.detect_fasttext(text)
+            results['fasttext'] = self._method_result('fasttext', ft_results)
         
         if self.use_langdetect:
-            results['langdetect'] = self.detect(text, method='langdetect')
+            if detectable:
+                ld_results = self.detect_langdetect(text)
+            results['langdetect'] = self._method_result('langdetect', ld_results)
         
         # Добавляем результат голосования
-        results['vote'] = self._vote_language(text)
+        results['vote'] = self._combine_votes(ft_results, ld_results)
         
         # Находим метод с наивысшей уверенностью
         best_method = None
@@ -439,79 +776,69 @@ class ExternalDetector:
         Returns:
             List[Dict[str, Any]]: Список языков с уверенностью определения
         """
-        if not text or not isinstance(text, str) or len(text.strip()) < 3:
+        if not text or not isinstance(text, str) or _too_short(text, 3):
             return [{'language': 'unknown', 'confidence': 0.0, 'method': 'all'}]
         
-        # Список всех предсказаний от разных методов
-        all_predictions = []
+        # Сумма уверенностей, число и методы предсказаний по каждому языку,
+        # накапливаются сразу, без промежуточного списка предсказаний
+        language_scores = {}
         
-        # Добавляем результаты fastText (до n языков)
+        # fastText (до n языков) и langdetect
+        predictors = []
         if self.use_fasttext:
-            try:
-                ft_results = self.detect_fasttext(text, k=n)
-                for result in ft_results:
-                    all_predictions.append({
-                        'language': result['language'],
-                        'confidence': result['confidence'],
-                        'method': 'fasttext'
-                    })
-            except Exception as e:
-                logger.debug(f"Ошибка при получении топ языков с fastText: {e}")
-        
-        # Добавляем результат langdetect
+            predictors.append(('fasttext', lambda: self.detect_fasttext(text, k=n)))
         if self.use_langdetect:
+            predictors.append(('langdetect', lambda: self.detect_langdetect(text)))
+        
+        for method, predict in predictors:
             try:
-                ld_results = self.detect_langdetect(text)
-                for result in ld_results:
-                    all_predictions.append({
-                        'language': result['language'],
-                        'confidence': result['confidence'],
-                        'method': 'langdetect'
-                    })
+                for result in predict():
+                    scores = language_scores.get(result['language'])
+                    if scores is None:
+                        language_scores[result['language']] = [result['confidence'], 1, [method]]
+                    else:
+                        scores[0] += result['confidence']
+                        scores[1] += 1
+                        scores[2].append(method)
             except Exception as e:
-                logger.debug(f"Ошибка при получении топ языков с langdetect: {e}")
+                logger.debug(f"Ошибка при получении топ языков с {method}: {e}")
         
         # Если нет предсказаний, возвращаем неизвестный язык
-        if not all_predictions:
+        if not language_scores:
             return [{'language': 'unknown', 'confidence': 0.0, 'method': 'all'}]
         
-        # Группируем предсказания по языку и находим среднюю уверенность
-        language_scores = {}
-        
-        for pred in all_predictions:
-            lang = pred['language']
-            conf = pred['confidence']
-            method = pred['method']
-            
-            if lang not in language_scores:
-                language_scores[lang] = {
-                    'sum': conf,
-                    'count': 1,
-                    'methods': [method]
-                }
-            else:
-                language_scores[lang]['sum'] += conf
-                language_scores[lang]['count'] += 1
-                language_scores[lang]['methods'].append(method)
-        
         # Создаем список языков с усредненной уверенностью
-        languages = []
-        
-        for lang, data in language_scores.items():
-            avg_confidence = data['sum'] / data['count']
-            methods = ', '.join(set(data['methods']))
-            
-            languages.append({
+        languages = [
+            {
                 'language': lang,
-                'confidence': avg_confidence,
-                'method': methods
-            })
+                'confidence': confidence_sum / count,
+                'method': ', '.join(set(methods))
+            }
+            for lang, (confidence_sum, count, methods) in language_scores.items()
+        ]
         
         # Сортируем по уверенности и ограничиваем количество результатов
         languages.sort(key=lambda x: x['confidence'], reverse=True)
         
         return languages[:n]
     
+    def warmup(self) -> None:
+        """
+        Выполняет пробное определение языка, чтобы первый настоящий запрос
+        не платил за подгрузку страниц модели fastText и профилей langdetect.
+        """
+        if self.use_fasttext and self.fasttext_model:
+            try:
+                self.fasttext_model.predict("hello")
+            except Exception as e:
+                logger.debug(f"Ошибка при прогреве fastText: {e}")
+        
+        if self.use_langdetect and self.langdetect_module:
+            try:
+                self.langdetect_module.detect("hello world")
+            except Exception as e:
+                logger.debug(f"Ошибка при прогреве langdetect: {e}")
+    
     def get_language(self, text: str, method: str = 'all') -> str:
         """
         Определяет язык текста и возвращает только код языка без дополнительной информации.
@@ -527,6 +854,27 @@ class ExternalDetector:
         return result.get('language', 'unknown')
 
 
+@functools.lru_cache(maxsize=8)
+def _get_detector(
+    use_fasttext: bool,
+    use_langdetect: bool,
+    fasttext_model_path: Optional[str],
+    min_confidence: float
+) -> ExternalDetector:
+    """
+    Возвращает детектор для указанных настроек, создавая его при первом обращении.
+    
+    Модель fastText и langdetect загружаются один раз на процесс,
+    а не при каждом вызове вспомогательных функций.
+    """
+    return ExternalDetector(
+        use_fasttext=use_fasttext,
+        use_langdetect=use_langdetect,
+        fasttext_model_path=fasttext_model_path,
+        min_confidence=min_confidence
+    )
+
+
 def detect_language_external(
     text: str, 
     method: str = 'all',
@@ -549,12 +897,7 @@ def detect_language_external(
     Returns:
         Dict[str, Any]: Словарь с языком и уверенностью определения
     """
-    detector = ExternalDetector(
-        use_fasttext=use_fasttext,
-        use_langdetect=use_langdetect,
-        fasttext_model_path=fasttext_model_path,
-        min_confidence=min_confidence
-    )
+    detector = _get_detector(use_fasttext, use_langdetect, fasttext_model_path, min_confidence)
     
     return detector.detect(text, method=method)
 
@@ -582,73 +925,63 @@ def get_language(
     Returns:
         str: Код языка ('en', 'ru', 'uk', ...) или 'unknown'
     """
-    detector = ExternalDetector(
-        use_fasttext=use_fasttext,
-        use_langdetect=use_langdetect,
-        fasttext_model_path=fasttext_model_path,
-        min_confidence=min_confidence
-    )
+    detector = _get_detector(use_fasttext, use_langdetect, fasttext_model_path, min_confidence)
     
     return detector.get_language(text, method=method)
 
 
-def get_supported_languages() -> Dict[str, Set[str]]:
+# Языки fastText (176 языков)
+_FASTTEXT_LANGS: FrozenSet[str] = frozenset({
+    'ab', 'ace', 'ady', 'af', 'ak', 'als', 'am', 'an', 'ang', 'ar', 'arc',
+    'arz', 'as', 'ast', 'av', 'ay', 'az', 'ba', 'bar', 'bcl', 'be', 'bg',
+    'bh', 'bi', 'bjn', 'bm', 'bn', 'bo', 'bpy', 'br', 'bs', 'bxr', 'ca',
+    'cbk', 'ce', 'ceb', 'ch', 'chr', 'chy', 'co', 'cr', 'crh', 'cs', 'csb',
+    'cu', 'cv', 'cy', 'da', 'de', 'diq', 'dsb', 'dty', 'dv', 'dz', 'ee',
+    'el', 'en', 'eo', 'es', 'et', 'eu', 'ext', 'fa', 'ff', 'fi', 'fj', 'fo',
+    'fr', 'frp', 'frr', 'fur', 'fy', 'ga', 'gag', 'gan', 'gd', 'gl', 'glk',
+    'gn', 'gom', 'got', 'gu', 'gv', 'ha', 'hak', 'haw', 'he', 'hi', 'hif',
+    'ho', 'hr', 'hsb', 'ht', 'hu', 'hy', 'ia', 'id', 'ie', 'ig', 'ik', 'ilo',
+    'io', 'is', 'it', 'iu', 'ja', 'jam', 'jbo', 'jv', 'ka', 'kaa', 'kab',
+    'kbd', 'kbp', 'kg', 'ki', 'kj', 'kk', 'kl', 'km', 'kn', 'ko', 'koi',
+    'kr', 'krc', 'ks', 'ksh', 'ku', 'kv', 'kw', 'ky', 'la', 'lad', 'lb',
+    'lbe', 'lez', 'lfn', 'lg', 'li', 'lij', 'lmo', 'ln', 'lo', 'lt', 'ltg',
+    'lv', 'mai', 'mdf', 'mg', 'mh', 'mhr', 'mi', 'min', 'mk', 'ml', 'mn',
+    'mr', 'mrj', 'ms', 'mt', 'mus', 'mwl', 'my', 'myv', 'mzn', 'na', 'nah',
+    'nap', 'nds', 'ne', 'new', 'ng', 'nl', 'nn', 'no', 'nov', 'nrm', 'nso',
+    'nv', 'ny', 'oc', 'olo', 'om', 'or', 'os', 'pa', 'pag', 'pam', 'pap',
+    'pcd', 'pdc', 'pfl', 'pi', 'pih', 'pl', 'pms', 'pnb', 'pnt', 'ps', 'pt',
+    'qu', 'rm', 'rmy', 'rn', 'ro', 'ru', 'rue', 'rw', 'sa', 'sah', 'sc',
+    'scn', 'sco', 'sd', 'se', 'sg', 'sh', 'si', 'sk', 'sl', 'sm', 'sn', 'so',
+    'sq', 'sr', 'srn', 'ss', 'st', 'stq', 'su', 'sv', 'sw', 'szl', 'ta', 'tcy',
+    'te', 'tet', 'tg', 'th', 'ti', 'tk', 'tl', 'tn', 'to', 'tpi', 'tr', 'ts',
+    'tt', 'tum', 'tw', 'ty', 'tyv', 'udm', 'ug', 'uk', 'ur', 'uz', 've', 'vec',
+    'vep', 'vi', 'vls', 'vo', 'wa', 'war', 'wo', 'wuu', 'xal', 'xh', 'xmf',
+    'yi', 'yo', 'za', 'zea', 'zh', 'zu'
+})
+
+# Языки langdetect (55 языков)
+_LANGDETECT_LANGS: FrozenSet[str] = frozenset({
+    'af', 'ar', 'bg', 'bn', 'ca', 'cs', 'cy', 'da', 'de', 'el', 'en', 'es',
+    'et', 'fa', 'fi', 'fr', 'gu', 'he', 'hi', 'hr', 'hu', 'id', 'it', 'ja',
+    'kn', 'ko', 'lt', 'lv', 'mk', 'ml', 'mr', 'ne', 'nl', 'no', 'pa', 'pl',
+    'pt', 'ro', 'ru', 'sk', 'sl', 'so', 'sq', 'sv', 'sw', 'ta', 'te', 'th',
+    'tl', 'tr', 'uk', 'ur', 'vi', 'zh-cn', 'zh-tw'
+})
+
+
+def get_supported_languages() -> Dict[str, FrozenSet[str]]:
     """
     Возвращает список языков, поддерживаемых каждой библиотекой.
     
+    Множества неизменяемые и создаются один раз при импорте модуля.
+    
     Returns:
-        Dict[str, Set[str]]: Словарь с списками языков для каждой библиотеки
+        Dict[str, FrozenSet[str]]: Словарь с списками языков для каждой библиотеки
     """
-    languages = {
-        'fasttext': set(),
-        'langdetect': set()
+    return {
+        'fasttext': _FASTTEXT_LANGS,
+        'langdetect': _LANGDETECT_LANGS
     }
-    
-    # Языки fastText (176 языков)
-    try:
-        languages['fasttext'] = {
-            'ab', 'ace', 'ady', 'af', 'ak', 'als', 'am', 'an', 'ang', 'ar', 'arc',
-            'arz', 'as', 'ast', 'av', 'ay', 'az', 'ba', 'bar', 'bcl', 'be', 'bg',
-            'bh', 'bi', 'bjn', 'bm', 'bn', 'bo', 'bpy', 'br', 'bs', 'bxr', 'ca',
-            'cbk', 'ce', 'ceb', 'ch', 'chr', 'chy', 'co', 'cr', 'crh', 'cs', 'csb',
-            'cu', 'cv', 'cy', 'da', 'de', 'diq', 'dsb', 'dty', 'dv', 'dz', 'ee',
-            'el', 'en', 'eo', 'es', 'et', 'eu', 'ext', 'fa', 'ff', 'fi', 'fj', 'fo',
-            'fr', 'frp', 'frr', 'fur', 'fy', 'ga', 'gag', 'gan', 'gd', 'gl', 'glk',
-            'gn', 'gom', 'got', 'gu', 'gv', 'ha', 'hak', 'haw', 'he', 'hi', 'hif',
-            'ho', 'hr', 'hsb', 'ht', 'hu', 'hy', 'ia', 'id', 'ie', 'ig', 'ik', 'ilo',
-            'io', 'is', 'it', 'iu', 'ja', 'jam', 'jbo', 'jv', 'ka', 'kaa', 'kab',
-            'kbd', 'kbp', 'kg', 'ki', 'kj', 'kk', 'kl', 'km', 'kn', 'ko', 'koi',
-            'kr', 'krc', 'ks', 'ksh', 'ku', 'kv', 'kw', 'ky', 'la', 'lad', 'lb',
-            'lbe', 'lez', 'lfn', 'lg', 'li', 'lij', 'lmo', 'ln', 'lo', 'lt', 'ltg',
-            'lv', 'mai', 'mdf', 'mg', 'mh', 'mhr', 'mi', 'min', 'mk', 'ml', 'mn',
-            'mr', 'mrj', 'ms', 'mt', 'mus', 'mwl', 'my', 'myv', 'mzn', 'na', 'nah',
-            'nap', 'nds', 'ne', 'new', 'ng', 'nl', 'nn', 'no', 'nov', 'nrm', 'nso',
-            'nv', 'ny', 'oc', 'olo', 'om', 'or', 'os', 'pa', 'pag', 'pam', 'pap',
-            'pcd', 'pdc', 'pfl', 'pi', 'pih', 'pl', 'pms', 'pnb', 'pnt', 'ps', 'pt',
-            'qu', 'rm', 'rmy', 'rn', 'ro', 'ru', 'rue', 'rw', 'sa', 'sah', 'sc',
-            'scn', 'sco', 'sd', 'se', 'sg', 'sh', 'si', 'sk', 'sl', 'sm', 'sn', 'so',
-            'sq', 'sr', 'srn', 'ss', 'st', 'stq', 'su', 'sv', 'sw', 'szl', 'ta', 'tcy',
-            'te', 'tet', 'tg', 'th', 'ti', 'tk', 'tl', 'tn', 'to', 'tpi', 'tr', 'ts',
-            'tt', 'tum', 'tw', 'ty', 'tyv', 'udm', 'ug', 'uk', 'ur', 'uz', 've', 'vec',
-            'vep', 'vi', 'vls', 'vo', 'wa', 'war', 'wo', 'wuu', 'xal', 'xh', 'xmf',
-            'yi', 'yo', 'za', 'zea', 'zh', 'zu'
-        }
-    except Exception:
-        pass
-    
-    # Языки langdetect (55 языков)
-    try:
-        languages['langdetect'] = {
-            'af', 'ar', 'bg', 'bn', 'ca', 'cs', 'cy', 'da', 'de', 'el', 'en', 'es',
-            'et', 'fa', 'fi', 'fr', 'gu', 'he', 'hi', 'hr', 'hu', 'id', 'it', 'ja',
-            'kn', 'ko', 'lt', 'lv', 'mk', 'ml', 'mr', 'ne', 'nl', 'no', 'pa', 'pl',
-            'pt', 'ro', 'ru', 'sk', 'sl', 'so', 'sq', 'sv', 'sw', 'ta', 'te', 'th',
-            'tl', 'tr', 'uk', 'ur', 'vi', 'zh-cn', 'zh-tw'
-        }
-    except Exception:
-        pass
-    
-    return languages
 
 
 # Пример использования
@@ -1,105 +1,256 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import re
+from collections import Counter
+
+# Ключ узла дерева окончаний, под которым лежит маска языков окончания.
+# Пустая строка не совпадает ни с одним символом слова.
+_TAG = ''
+
+# Биты маски языков
+_RU = 1
+_UK = 2
+
+# Любая серия знаков препинания и пробельных символов заменяется одним пробелом.
+# Выражение компилируется один раз при импорте
+_NON_WORD_SUB = re.compile(r'\W+').sub
+
+
+def _build_char_class(letter_sets):
+    """
+    Строит таблицу классов букв: буква -> битовая маска наборов, в которые она входит.
+    
+    Args:
+        letter_sets (tuple): Наборы букв; i-й набор задает бит 1 << i
+        
+    Returns:
+        dict: Буква -> маска
+    """
+    char_class = {}
+    for bit, letters in enumerate(letter_sets):
+        for char in letters:
+            char_class[char] = char_class.get(char, 0) | (1 << bit)
+    return char_class
+
+
+def _build_ending_trie(endings_by_lang):
+    """
+    Строит дерево перевернутых окончаний.
+    
+    Args:
+        endings_by_lang (tuple): Пары (бит языка, окончания)
+        
+    Returns:
+        dict: Корень дерева; в узле конца окончания под ключом _TAG лежит маска языков
+    """
+    trie = {}
+    for lang_bit, endings in endings_by_lang:
+        for ending in endings:
+            node = trie
+            for char in reversed(ending):
+                node = node.setdefault(char, {})
+            node[_TAG] = node.get(_TAG, 0) | lang_bit
+    return trie
+
+
+def _build_digram_weights(ru_digrams, uk_digrams):
+    """
+    Строит общий словарь буквосочетаний с весами обоих языков.
+    
+    Args:
+        ru_digrams (tuple): Русские буквосочетания
+        uk_digrams (tuple): Украинские буквосочетания
+        
+    Returns:
+        dict: Сочетание -> (вес ru, вес uk), вес - число повторов в списке языка
+    """
+    ru_counts = Counter(ru_digrams)
+    uk_counts = Counter(uk_digrams)
+    return {
+        digram: (ru_counts[digram], uk_counts[digram])
+        for digram in dict.fromkeys(uk_digrams + ru_digrams)
+    }
+
+
+def _build_digram_gain_bounds(digram_weights):
+    """
+    Строит верхние оценки вклада буквосочетаний в разницу баллов языков.
+    
+    Вхождения сочетаний одной длины, начинающихся с буквы c, занимают разные
+    позиции текста, поэтому их не больше, чем букв c. Значит, на каждую букву c
+    разница баллов сдвигается не больше, чем на сумму по длинам максимального
+    перевеса среди сочетаний этой длины, начинающихся с c.
+    
+    Args:
+        digram_weights (dict): Сочетание -> (вес ru, вес uk)
+        
+    Returns:
+        tuple: (ru_gain, uk_gain) - словари буква -> наибольший перевес
+               соответствующего языка на одно вхождение буквы
+    """
+    ru_best = {}
+    uk_best = {}
+    for digram, (ru_weight, uk_weight) in digram_weights.items():
+        key = (digram[0], len(digram))
+        ru_best[key] = max(ru_best.get(key, 0), ru_weight - uk_weight)
+        uk_best[key] = max(uk_best.get(key, 0), uk_weight - ru_weight)
+    
+    ru_gain = {}
+    uk_gain = {}
+    for best, gain in ((ru_best, ru_gain), (uk_best, uk_gain)):
+        for (char, _), value in best.items():
+            if value:
+                gain[char] = gain.get(char, 0) + value
+    return ru_gain, uk_gain
+
+
 class LangDetector:
     """
     Класс для определения языка текста (русский или украинский)
     без использования внешних зависимостей.
     """
     
+    # Сколько последних текстов помнит кэш результатов анализа
+    CACHE_SIZE = 256
+    
+    # Кэшируются только тексты не длиннее этого порога: длинные документы
+    # редко повторяются, а их слова и счетчики символов занимают много памяти
+    CACHE_MAX_TEXT_LEN = 1024
+    
+    # Лингвистические данные неизменяемы и общие для всех экземпляров:
+    # они и производные таблицы строятся один раз при импорте модуля
+    
+    # Уникальные буквы для русского языка
+    russian_unique = frozenset(['ы', 'ъ', 'э'])
+    
+    # Уникальные буквы для украинского языка
+    ukrainian_unique = frozenset(['є', 'і', 'ї', 'ґ'])
+    
+    # Буквы, которые чаще встречаются в украинском
+    uk_frequent = frozenset(['і', 'є', 'ї', 'ґ', 'ь'])
+    
+    # Буквы, которые чаще встречаются в русском
+    ru_frequent = frozenset(['ы', 'ъ', 'э'])
+    
+    # Уникальные буквы кортежами: по ним суммируются счетчики символов
+    _ru_unique_tuple = tuple(russian_unique)
+    _uk_unique_tuple = tuple(ukrainian_unique)
+    
+    # Класс каждой интересной буквы одной маской: бит 0 - уникальная ru,
+    # бит 1 - уникальная uk, бит 2 - частотная ru, бит 3 - частотная uk
+    _char_class = _build_char_class((russian_unique, ukrainian_unique, ru_frequent, uk_frequent))
+    
+    # Типичные украинские окончания слов
+    ukrainian_endings = (
+        'ою', 'ого', 'ої', 'ий', 'ій', 'ися', 'ись',
+        'ться', 'еться', 'иться', 'ються', 'уються',
+        'іти', 'ати', 'ити', 'ути', 'яти', 'емо', 'єте', 'ємо'
+    )
+    
+    # Типичные русские окончания слов
+    russian_endings = (
+        'ого', 'его', 'ому', 'ему', 'ой', 'ый', 'ий', 'ться',
+        'тся', 'ешь', 'ет', 'ем', 'ете', 'ут', 'ют', 'ят',
+        'ать', 'ить', 'оть', 'уть', 'еть', 'ых', 'их'
+    )
+    
+    # Дерево перевернутых окончаний: слово проходится с конца один раз
+    _ending_trie = _build_ending_trie(((_RU, russian_endings), (_UK, ukrainian_endings)))
+    
+    # Маркерные слова для украинского языка
+    ukrainian_words = frozenset([
+        'це', 'або', 'чи', 'що', 'як', 'який', 'котрий', 'де', 'коли',
+        'наче', 'бо', 'тому', 'хто', 'також', 'від', 'з', 'із', 'зі',
+        'до', 'у', 'при', 'для', 'та', 'і', 'й', 'але', 'проте', 'однак',
+        'хоча', 'щоб', 'якщо', 'через', 'ще', 'так', 
+        'ні', 'не', 'є', 'був', 'була', 'було', 'були'
+    ])
+    
+    # Маркерные слова для русского языка
+    russian_words = frozenset([
+        'это', 'или', 'как', 'который', 'где', 'когда',
+        'словно', 'потому', 'кто', 'также', 'от', 'из', 'до',
+        'в', 'при', 'для', 'и', 'но', 'однако',
+        'хотя', 'чтобы', 'если', 'из-за', 'поэтому', 'ещё', 'да', 
+        'нет', 'был', 'была', 'было', 'были'
+    ])
+    
+    # Украинские буквосочетания (диграммы)
+    ukrainian_digrams = (
+        'ть', 'нн', 'ськ', 'ий', 'ій', 'тьс', 'ьс', 'ьк', 'дз', 'дж',
+        'ґу', 'ці', 'не', 'на', 'по', 'ви', 'за', 'що', 'чи', 'ої', 'ою'
+    )
+    
+    # Русские буквосочетания (диграммы)
+    russian_digrams = (
+        'ть', 'тс', 'ск', 'ый', 'ий', 'тьс', 'ться', 'нн', 'жи', 'ши',
+        'чн', 'чк', 'ни', 'не', 'на', 'по', 'вы', 'за', 'что', 'ли', 'ой', 'ом'
+    )
+    
+    # Общий словарь буквосочетаний: сочетание -> (вес ru, вес uk).
+    # Каждое сочетание ищется в тексте один раз, даже если оно есть у обоих языков
+    _digram_weights = _build_digram_weights(russian_digrams, ukrainian_digrams)
+    
+    # Наибольший перевес ru и uk от буквосочетаний на одно вхождение первой буквы
+    _ru_digram_gain, _uk_digram_gain = _build_digram_gain_bounds(_digram_weights)
+    
     def __init__(self):
-        # Уникальные буквы для русского языка
-        self.russian_unique = set(['ы', 'ъ', 'э'])
-        
-        # Уникальные буквы для украинского языка
-        self.ukrainian_unique = set(['є', 'і', 'ї', 'ґ'])
-        
-        # Буквы, которые чаще встречаются в украинском
-        self.uk_frequent = set(['і', 'є', 'ї', 'ґ', 'ь'])
-        
-        # Буквы, которые чаще встречаются в русском
-        self.ru_frequent = set(['ы', 'ъ', 'э'])
-        
-        # Типичные украинские окончания слов
-        self.ukrainian_endings = [
-            'ою', 'ою', 'ого', 'ої', 'ий', 'ій', 'ися', 'ись',
-            'ться', 'ться', 'еться', 'иться', 'ються', 'уються',
-            'іти', 'ати', 'ити', 'ути', 'яти', 'емо', 'єте', 'ємо'
-        ]
-        
-        # Типичные русские окончания слов
-        self.russian_endings = [
-            'ого', 'его', 'ому', 'ему', 'ой', 'ый', 'ий', 'ться',
-            'тся', 'ешь', 'ет', 'ем', 'ете', 'ут', 'ют', 'ят',
-            'ать', 'ить', 'оть', 'уть', 'еть', 'ых', 'их'
-        ]
-        
-        # Маркерные слова для украинского языка
-        self.ukrainian_words = [
-            'це', 'або', 'чи', 'що', 'як', 'який', 'котрий', 'де', 'коли',
-            'наче', 'бо', 'тому', 'хто', 'також', 'від', 'з', 'із', 'зі',
-            'до', 'у', 'при', 'для', 'та', 'і', 'й', 'але', 'проте', 'однак',
-            'хоча', 'щоб', 'якщо', 'коли', 'через', 'тому', 'ще', 'так', 
-            'ні', 'не', 'є', 'був', 'була', 'було', 'були'
-        ]
-        
-        # Маркерные слова для русского языка
-        self.russian_words = [
-            'это', 'или', 'как', 'который', 'где', 'когда',
-            'словно', 'потому', 'кто', 'также', 'от', 'из', 'до',
-            'в', 'при', 'для', 'и', 'но', 'однако',
-            'хотя', 'чтобы', 'если', 'из-за', 'поэтому', 'ещё', 'да', 
-            'нет', 'был', 'была', 'было', 'были'
-        ]
-        
-        # Украинские буквосочетания (диграммы)
-        self.ukrainian_digrams = [
-            'ть', 'нн', 'ськ', 'ий', 'ій', 'тьс', 'ьс', 'ьк', 'нн', 'дз', 'дж',
-            'ґу', 'ці', 'не', 'на', 'по', 'ви', 'за', 'що', 'чи', 'ої', 'ою'
-        ]
-        
-        # Русские буквосочетания (диграммы)
-        self.russian_digrams = [
-            'ть', 'тс', 'ск', 'ый', 'ий', 'тьс', 'ться', 'тс', 'нн', 'жи', 'ши',
-            'чн', 'чк', 'ни', 'не', 'на', 'по', 'вы', 'за', 'что', 'ли', 'ой', 'ом'
-        ]
-        
-    def _count_unique_letters(self, text):
+        # Кэш анализа: исходный текст -> [очищенный текст, слова, счетчик символов, метрики],
+        # в порядке обращения (LRU). Единственное состояние экземпляра
+        self._cache = {}
+        
+    def _count_unique_letters(self, text, counts=None):
         """
         Подсчитывает количество уникальных букв для каждого языка в тексте.
         
         Args:
             text (str): Текст для анализа
+            counts (Counter, optional): Счетчик символов текста, если уже посчитан
             
         Returns:
             tuple: (ru_count, uk_count)
         """
-        ru_unique_count = sum(1 for char in text if char in self.russian_unique)
-        uk_unique_count = sum(1 for char in text if char in self.ukrainian_unique)
+        if counts is None:
+            counts = Counter(text)
+        
+        ru_unique_count = sum(counts[char] for char in self._ru_unique_tuple)
+        uk_unique_count = sum(counts[char] for char in self._uk_unique_tuple)
         
         return ru_unique_count, uk_unique_count
         
-    def _count_frequent_letters(self, text):
+    def _count_letter_classes(self, counts):
         """
-        Подсчитывает количество частотных букв для каждого языка в тексте.
+        Подсчитывает уникальные и частотные буквы обоих языков за один проход по таблице классов.
         
         Args:
-            text (str): Текст для анализа
+            counts (Counter): Счетчик символов текста
             
         Returns:
-            tuple: (ru_count, uk_count)
+            tuple: (ru_unique, uk_unique, ru_freq, uk_freq)
         """
-        ru_char_frequency = sum(1 for char in text if char in self.ru_frequent)
-        uk_char_frequency = sum(1 for char in text if char in self.uk_frequent)
-        
-        return ru_char_frequency, uk_char_frequency
-        
-    def _check_word_endings(self, words):
+        ru_unique = uk_unique = ru_freq = uk_freq = 0
+        
+        for char, mask in self._char_class.items():
+            found = counts[char]
+            if found:
+                if mask & 1:
+                    ru_unique += found
+                if mask & 2:
+                    uk_unique += found
+                if mask & 4:
+                    ru_freq += found
+                if mask & 8:
+                    uk_freq += found
+        
+        return ru_unique, uk_unique, ru_freq, uk_freq
+    
+    def _check_digrams(self, text):
         """
-        Анализирует окончания слов для определения языка.
+        Проверяет наличие характерных буквосочетаний в тексте.
         
         Args:
-            words (list): Список слов для анализа
+            text (str): Текст для анализа
             
         Returns:
             tuple: (ru_score, uk_score)
@@ -107,72 +258,163 @@ class LangDetector:
         ru_score = 0
         uk_score = 0
         
-        for word in words:
-            if len(word) < 3:
-                continue
-                
-            # Проверяем украинские окончания
-            for ending in self.ukrainian_endings:
-                if word.endswith(ending):
-                    uk_score += 1
-                    break
-                    
-            # Проверяем русские окончания
-            for ending in self.russian_endings:
-                if word.endswith(ending):
-                    ru_score += 1
-                    break
+        text_lower = text.lower()
         
+        for digram, (ru_weight, uk_weight) in self._digram_weights.items():
+            found = text_lower.count(digram)
+            if found:
+                ru_score += found * ru_weight
+                uk_score += found * uk_weight
+            
         return ru_score, uk_score
         
-    def _check_marker_words(self, words):
+    def _score_words(self, cleaned_text, words, counts=None):
         """
-        Проверяет наличие маркерных слов в тексте.
+        Собирает метрики по буквам и словам (все, кроме буквосочетаний).
         
         Args:
-            words (list): Список слов для анализа
+            cleaned_text (str): Очищенный текст
+            words (list): Слова очищенного текста (в нижнем регистре)
+            counts (Counter, optional): Счетчик символов текста, если уже посчитан
             
         Returns:
-            tuple: (ru_score, uk_score)
+            tuple: Пары (ru, uk) в порядке: уникальные буквы, частотные буквы,
+                   окончания, маркерные слова
         """
-        ru_score = 0
-        uk_score = 0
+        if counts is None:
+            counts = Counter(cleaned_text)
         
-        # Приводим слова к нижнему регистру для сравнения
-        words_lower = [word.lower() for word in words]
+        ru_unique, uk_unique, ru_freq, uk_freq = self._count_letter_classes(counts)
+        unique = (ru_unique, uk_unique)
+        frequent = (ru_freq, uk_freq)
         
-        for word in words_lower:
+        # Окончания и маркерные слова за один проход по словам
+        ru_endings = uk_endings = 0
+        ru_markers = uk_markers = 0
+        trie = self._ending_trie
+        
+        for word in words:
             if word in self.ukrainian_words:
-                uk_score += 1
-                
+                uk_markers += 1
             if word in self.russian_words:
-                ru_score += 1
-        
-        return ru_score, uk_score
+                ru_markers += 1
+            
+            if len(word) < 3:
+                continue
+            
+            # Один проход по дереву окончаний с конца слова. Маски всех совпавших
+            # окончаний объединяются: язык засчитывается, если совпало хотя бы одно
+            mask = 0
+            node = trie
+            for char in reversed(word):
+                node = node.get(char)
+                if node is None:
+                    break
+                mask |= node.get(_TAG, 0)
+            
+            ru_endings += mask & _RU
+            uk_endings += mask >> 1
         
-    def _check_digrams(self, text):
+        return unique, frequent, (ru_endings, uk_endings), (ru_markers, uk_markers)
+    
+    def _prepare(self, text):
         """
-        Проверяет наличие характерных буквосочетаний в тексте.
+        Очищает текст, разбивает его на слова и считает символы.
+        
+        Результат для текстов не длиннее CACHE_MAX_TEXT_LEN запоминается в кэше.
+        Кэш вытесняет давно не использованные тексты (LRU): словарь хранит записи
+        в порядке обращения, при попадании запись переносится в конец.
         
         Args:
-            text (str): Текст для анализа
+            text (str): Исходный текст
             
         Returns:
-            tuple: (ru_score, uk_score)
+            list: [cleaned_text, words, counts, metrics, digrams]. counts - Counter символов
+                  (None, если слов нет или текст ASCII), metrics - результат _score_words,
+                  digrams - результат _check_digrams; пока не посчитаны - None
         """
-        ru_score = 0
-        uk_score = 0
+        # Перенос в конец через pop и повторную вставку: каждая операция атомарна,
+        # поэтому одновременные обращения из нескольких потоков не приводят к ошибкам
+        cache = self._cache
+        entry = cache.pop(text, None)
+        if entry is not None:
+            cache[text] = entry
+            return entry
         
-        text_lower = text.lower()
+        cleaned_text = self._clean_text(text)
+        words = cleaned_text.split()
+        # Для ASCII-текста символы не считаются: признаков в нем быть не может
+        counts = Counter(cleaned_text) if words and not cleaned_text.isascii() else None
+        entry = [cleaned_text, words, counts, None, None]
+        
+        if len(text) > self.CACHE_MAX_TEXT_LEN:
+            return entry
+        
+        if len(cache) >= self.CACHE_SIZE:
+            # Экземпляр может использоваться из нескольких потоков: старейшую
+            # запись мог уже удалить другой поток, а кэш - измениться во время чтения
+            try:
+                cache.pop(next(iter(cache), None), None)
+            except RuntimeError:
+                pass
+        cache[text] = entry
+        return entry
+    
+    def _entry_metrics(self, entry):
+        """
+        Возвращает все метрики записи кэша, считая их при первом обращении.
         
-        for digram in self.ukrainian_digrams:
-            uk_score += text_lower.count(digram)
+        Args:
+            entry (list): Запись, полученная из _prepare (со словами)
             
-        for digram in self.russian_digrams:
-            ru_score += text_lower.count(digram)
+        Returns:
+            tuple: Пары (ru, uk) в порядке: уникальные буквы, частотные буквы,
+                   окончания, маркерные слова, диграммы
+        """
+        return self._entry_word_metrics(entry) + (self._entry_digrams(entry),)
+    
+    def _entry_word_metrics(self, entry):
+        """
+        Возвращает метрики записи кэша без буквосочетаний, считая их при первом обращении.
+        
+        Args:
+            entry (list): Запись, полученная из _prepare (со словами)
             
-        return ru_score, uk_score
+        Returns:
+            tuple: Результат _score_words
+        """
+        if entry[3] is None:
+            entry[3] = self._score_words(entry[0], entry[1], entry[2])
+        return entry[3]
+    
+    def _entry_digrams(self, entry):
+        """
+        Возвращает баллы буквосочетаний записи кэша, считая их при первом обращении.
         
+        Args:
+            entry (list): Запись, полученная из _prepare (со словами)
+            
+        Returns:
+            tuple: (ru_score, uk_score)
+        """
+        if entry[4] is None:
+            entry[4] = self._check_digrams(entry[0])
+        return entry[4]
+    
+    def _entry_unique(self, entry):
+        """
+        Возвращает количество уникальных букв записи кэша без подсчета остальных метрик.
+        
+        Args:
+            entry (list): Запись, полученная из _prepare (со словами)
+            
+        Returns:
+            tuple: (ru_count, uk_count)
+        """
+        if entry[3] is not None:
+            return entry[3][0]
+        return self._count_unique_letters(entry[0], entry[2])
+    
     def _clean_text(self, text):
         """
         Очищает текст от знаков препинания и приводит к нижнему регистру.
@@ -183,18 +425,11 @@ class LangDetector:
         Returns:
             str: Очищенный текст
         """
-        import re
-        
         # Приводим к нижнему регистру
         text = text.lower()
         
-        # Заменяем все знаки препинания на пробелы
-        text = re.sub(r'[^\w\s]', ' ', text)
-        
-        # Заменяем множественные пробелы на один
-        text = re.sub(r'\s+', ' ', text)
-        
-        return text.strip()
+        # Заменяем знаки препинания и множественные пробелы одним пробелом
+        return _NON_WORD_SUB(' ', text).strip()
         
     def detect_language(self, text):
         """
@@ -208,31 +443,31 @@ class LangDetector:
         """
         if not text or not isinstance(text, str):
             return 'unknown'
-            
-        # Очищаем текст
-        cleaned_text = self._clean_text(text)
         
-        # Если текст пустой после очистки
-        if not cleaned_text:
+        # Очищенный текст, слова и счетчик символов (из кэша, если текст уже встречался)
+        entry = self._prepare(text)
+        
+        # Если текст пустой после очистки или нет слов
+        if not entry[1]:
             return 'unknown'
-            
-        # Разбиваем на слова
-        words = cleaned_text.split()
         
-        # Если нет слов
-        if not words:
+        # Все признаки обоих языков - кириллические, у ASCII-текста все баллы нулевые
+        if entry[0].isascii():
             return 'unknown'
-            
+        
         # Проверяем уникальные буквы
-        ru_unique, uk_unique = self._count_unique_letters(cleaned_text)
+        ru_unique, uk_unique = self._entry_unique(entry)
         
         # Если есть явные признаки одного из языков по уникальным буквам
         if ru_unique > 0 and uk_unique == 0:
             return 'russian'
         elif uk_unique > 0 and ru_unique == 0:
             return 'ukrainian'
-            
+        
         # Если нет явных признаков, проводим комплексный анализ
+        (_, (ru_freq, uk_freq), (ru_endings, uk_endings),
+         (ru_markers, uk_markers)) = self._entry_word_metrics(entry)
+        
         scores = {
             'russian': 0,
             'ukrainian': 0
@@ -242,23 +477,31 @@ class LangDetector:
         scores['russian'] += ru_unique * 2  # Умножаем на вес
         scores['ukrainian'] += uk_unique * 2  # Умножаем на вес
         
-        # Проверяем частотные буквы
-        ru_freq, uk_freq = self._count_frequent_letters(cleaned_text)
+        # Частотные буквы
         scores['russian'] += ru_freq
         scores['ukrainian'] += uk_freq
         
-        # Проверяем окончания слов
-        ru_endings, uk_endings = self._check_word_endings(words)
+        # Окончания слов
         scores['russian'] += ru_endings * 1.5  # Умножаем на вес
         scores['ukrainian'] += uk_endings * 1.5  # Умножаем на вес
         
-        # Проверяем маркерные слова
-        ru_markers, uk_markers = self._check_marker_words(words)
+        # Маркерные слова
         scores['russian'] += ru_markers * 3  # Умножаем на вес
         scores['ukrainian'] += uk_markers * 3  # Умножаем на вес
         
-        # Проверяем диграммы
-        ru_digrams, uk_digrams = self._check_digrams(cleaned_text)
+        # Диграммы считаются, только если они могут изменить результат:
+        # разница баллов сравнивается с наибольшим возможным перевесом
+        # от буквосочетаний, который оценивается по счетчику символов
+        difference = scores['russian'] - scores['ukrainian']
+        counts = entry[2]
+        if difference > 0:
+            if difference > sum(counts[char] * gain for char, gain in self._uk_digram_gain.items()):
+                return 'russian'
+        elif difference < 0:
+            if -difference > sum(counts[char] * gain for char, gain in self._ru_digram_gain.items()):
+                return 'ukrainian'
+        
+        ru_digrams, uk_digrams = self._entry_digrams(entry)
         scores['russian'] += ru_digrams
         scores['ukrainian'] += uk_digrams
         
@@ -283,26 +526,26 @@ class LangDetector:
         if not text or not isinstance(text, str):
             return {'language': 'unknown', 'confidence': 0.0, 'details': {}}
         
-        # Очищаем текст
-        cleaned_text = self._clean_text(text)
-        
-        # Если текст пустой после очистки
-        if not cleaned_text:
-            return {'language': 'unknown', 'confidence': 0.0, 'details': {}}
-        
-        # Разбиваем на слова
-        words = cleaned_text.split()
+        # Очищенный текст, слова и счетчик символов (из кэша, если текст уже встречался)
+        return self._confidence(self._prepare(text))
+    
+    def _confidence(self, entry):
+        """
+        Считает уверенность в определении языка для подготовленного текста.
         
-        # Если нет слов
-        if not words:
+        Args:
+            entry (list): Запись, полученная из _prepare
+            
+        Returns:
+            dict: Результат в формате get_confidence
+        """
+        # Если текст пустой после очистки или нет слов, а также для ASCII-текста
+        # (все признаки кириллические, баллы заведомо нулевые)
+        if not entry[1] or entry[0].isascii():
             return {'language': 'unknown', 'confidence': 0.0, 'details': {}}
         
-        # Собираем все метрики
-        ru_unique, uk_unique = self._count_unique_letters(cleaned_text)
-        ru_freq, uk_freq = self._count_frequent_letters(cleaned_text)
-        ru_endings, uk_endings = self._check_word_endings(words)
-        ru_markers, uk_markers = self._check_marker_words(words)
-        ru_digrams, uk_digrams = self._check_digrams(cleaned_text)
+        ((ru_unique, uk_unique), (ru_freq, uk_freq), (ru_endings, uk_endings),
+         (ru_markers, uk_markers), (ru_digrams, uk_digrams)) = self._entry_metrics(entry)
         
         # Рассчитываем взвешенные баллы для каждого языка
         scores = {
@@ -355,19 +598,25 @@ class LangDetector:
         if not text or not isinstance(text, str):
             return {'error': 'Empty or invalid text'}
             
+        # Текст готовится один раз и для определения языка, и для статистики
+        entry = self._prepare(text)
+        
         # Определяем язык
-        result = self.get_confidence(text)
+        result = self._confidence(entry)
         
         # Определяем длину текста и количество слов
-        cleaned_text = self._clean_text(text)
-        words = cleaned_text.split() if cleaned_text else []
+        cleaned_text, words = entry[:2]
+        
+        # Слова в очищенном тексте разделены ровно одним пробелом, поэтому
+        # суммарная длина слов - это длина текста без (word_count - 1) пробелов
+        word_count = len(words)
         
         # Добавляем базовую статистику
         result['stats'] = {
             'text_length': len(text),
             'cleaned_length': len(cleaned_text),
-            'word_count': len(words),
-            'average_word_length': sum(len(word) for word in words) / len(words) if words else 0
+            'word_count': word_count,
+            'average_word_length': (len(cleaned_text) - word_count + 1) / word_count if words else 0
         }
         
         return result